@@ -7,7 +7,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
-import time
+import io
 import os
 
 from scraper import AliBabaScraper
@@ -56,9 +56,96 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Cached resources and data
+@st.cache_resource
+def get_scraper() -> AliBabaScraper:
+    """Shared scraper instance (keeps the requests.Session and UA pool alive)"""
+    return AliBabaScraper()
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def run_search(keyword: str, pages: int, _progress_cb=None) -> pd.DataFrame:
+    """Memoized product search - repeating the same search returns instantly"""
+    return get_scraper().search_products(keyword, pages, progress_cb=_progress_cb)
+
+
+def _df_fingerprint(df: pd.DataFrame):
+    """Cheap cache key for a scraped DataFrame (scraped_at changes every run)"""
+    return (len(df), tuple(df.columns), df['scraped_at'].iloc[0] if len(df) else 0)
+
+
+_DF_HASH = {pd.DataFrame: _df_fingerprint}
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def supplier_counts(df: pd.DataFrame) -> pd.Series:
+    """Products per supplier, cached across reruns"""
+    return df['supplier'].value_counts()
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def price_counts(df: pd.DataFrame) -> pd.Series:
+    """Products per price string, cached across reruns"""
+    return df['price'].value_counts()
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def unique_suppliers(df: pd.DataFrame) -> list:
+    """Distinct suppliers, cached across reruns"""
+    supplier = df['supplier']
+    if isinstance(supplier.dtype, pd.CategoricalDtype):
+        return supplier.cat.categories.tolist()
+    return supplier.unique().tolist()
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def supplier_bar(df: pd.DataFrame):
+    """Top-10 suppliers bar chart, built and serialized once per dataset"""
+    counts = supplier_counts(df).head(10)
+    return px.bar(
+        x=counts.index,
+        y=counts.values,
+        title="Top 10 Suppliers",
+        labels={'x': 'Supplier', 'y': 'Number of Products'}
+    )
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def price_histogram(df: pd.DataFrame):
+    """Price distribution histogram, built and serialized once per dataset"""
+    return px.histogram(
+        df,
+        x='price_min',
+        nbins=30,
+        title="Price Distribution",
+        labels={'price_min': 'Minimum Price'}
+    )
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def as_csv(df: pd.DataFrame) -> bytes:
+    """CSV bytes for download, serialized once per dataset"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, chunksize=10_000)
+    return buf.getvalue()
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def as_xlsx(df: pd.DataFrame) -> bytes:
+    """Excel bytes for download, serialized once per dataset"""
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name='products')
+    return buf.getvalue()
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def as_json(df: pd.DataFrame) -> str:
+    """JSON string for download, serialized once per dataset"""
+    return df.to_json(orient='records', indent=2)
+
+
 # Initialize session state
-if 'scraper' not in st.session_state:
-    st.session_state.scraper = AliBabaScraper()
 if 'products_df' not in st.session_state:
     st.session_state.products_df = pd.DataFrame()
 if 'scraping_complete' not in st.session_state:
@@ -107,21 +194,30 @@ with tab1:
             with st.spinner(f"Scraping AliBaba for '{keyword}'..."):
                 try:
                     # Initialize scraper
-                    scraper = st.session_state.scraper
-                    
+                    scraper = get_scraper()
+
                     # Create progress bar
                     progress_bar = st.progress(0)
                     status_text = st.empty()
-                    
-                    # Scrape products
-                    products_df = scraper.search_products(keyword, pages)
+
+                    # Scrape products (cached per keyword/pages combination)
+                    products_df = run_search(
+                        keyword, pages,
+                        _progress_cb=lambda page, total: progress_bar.progress(int(100 * page / total))
+                    )
                     
                     if not products_df.empty:
-                        # Update progress
-                        for i in range(100):
-                            time.sleep(0.01)
-                            progress_bar.progress(i + 1)
-                        
+                        # Optionally fetch detail pages in parallel
+                        if get_details:
+                            status_text.text("Fetching product details...")
+                            links = products_df['link'].astype(str).tolist()
+                            details_map = scraper.get_details_bulk(links)
+                            details = [details_map.get(link, {}) for link in links]
+                            products_df['description'] = [d.get('description', '') for d in details]
+                            products_df['shipping_info'] = [d.get('shipping_info', '') for d in details]
+
+                        progress_bar.progress(100)
+
                         # Store in session state
                         st.session_state.products_df = products_df
                         st.session_state.scraping_complete = True
@@ -144,6 +240,9 @@ with tab1:
                             st.metric("Errors", stats['errors'])
                         
                     else:
+                        # Don't negatively cache a failed scrape - drop the
+                        # entry so the next click actually re-fetches
+                        run_search.clear(keyword, pages)
                         st.error("No products found. Please try a different keyword.")
                         
                 except Exception as e:
@@ -161,14 +260,14 @@ with tab1:
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="stat-card">', unsafe_allow_html=True)
-            st.metric("Unique Suppliers", df['supplier'].nunique())
+            st.metric("Unique Suppliers", len(unique_suppliers(df)))
             st.markdown('</div>', unsafe_allow_html=True)
             
             st.markdown('<div class="stat-card">', unsafe_allow_html=True)
             # Extract numeric prices (simplified)
-            price_counts = df['price'].value_counts().head(3)
+            top_prices = price_counts(df).head(3)
             st.write("Top Prices:")
-            for price, count in price_counts.items():
+            for price, count in top_prices.items():
                 st.write(f"• {price}: {count}")
             st.markdown('</div>', unsafe_allow_html=True)
 
@@ -182,25 +281,12 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            # Suppliers distribution
-            supplier_counts = df['supplier'].value_counts().head(10)
-            fig1 = px.bar(
-                x=supplier_counts.index,
-                y=supplier_counts.values,
-                title="Top 10 Suppliers",
-                labels={'x': 'Supplier', 'y': 'Number of Products'}
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-        
+            # Suppliers distribution (top-10 cap keeps the payload small)
+            st.plotly_chart(supplier_bar(df), use_container_width=True)
+
         with col2:
-            # Price distribution (simplified)
-            price_data = df['price'].value_counts().head(10)
-            fig2 = px.pie(
-                names=price_data.index,
-                values=price_data.values,
-                title="Price Distribution"
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            # Price distribution over parsed numeric prices
+            st.plotly_chart(price_histogram(df), use_container_width=True)
         
         # Row 2: Data preview
         st.markdown("### 📋 Detailed View")
@@ -210,7 +296,7 @@ with tab2:
         with col1:
             selected_supplier = st.selectbox(
                 "Filter by Supplier",
-                ["All"] + list(df['supplier'].unique())
+                ["All"] + unique_suppliers(df)
             )
         
         with col2:
@@ -235,10 +321,10 @@ with tab3:
         
         with col1:
             # CSV Export
-            csv = df.to_csv(index=False).encode('utf-8')
+            csv_data = as_csv(df)
             st.download_button(
                 label="📥 Download CSV",
-                data=csv,
+                data=csv_data,
                 file_name=f"alibaba_products_{datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv",
                 use_container_width=True
@@ -246,16 +332,9 @@ with tab3:
         
         with col2:
             # Excel Export
-            excel_buffer = pd.ExcelWriter('temp.xlsx', engine='openpyxl')
-            df.to_excel(excel_buffer, index=False)
-            excel_buffer.save()
-            
-            with open('temp.xlsx', 'rb') as f:
-                excel_data = f.read()
-            
             st.download_button(
                 label="📊 Download Excel",
-                data=excel_data,
+                data=as_xlsx(df),
                 file_name=f"alibaba_products_{datetime.now().strftime('%Y%m%d')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True
@@ -263,10 +342,9 @@ with tab3:
         
         with col3:
             # JSON Export
-            json_str = df.to_json(orient='records', indent=2)
             st.download_button(
                 label="📄 Download JSON",
-                data=json_str,
+                data=as_json(df),
                 file_name=f"alibaba_products_{datetime.now().strftime('%Y%m%d')}.json",
                 mime="application/json",
                 use_container_width=True
@@ -284,7 +362,7 @@ with tab3:
         with col2:
             st.info(f"**Total Columns:** {len(df.columns)}")
         with col3:
-            st.info(f"**File Size:** ~{len(csv) / 1024:.1f} KB")
+            st.info(f"**File Size:** ~{len(csv_data) / 1024:.1f} KB")
     else:
         st.info("👈 Start scraping to export data")
 
@@ -2,36 +2,102 @@
 AliBaba Product Scraper - Core Module
 """
 
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from selectolax.parser import HTMLParser, Node
 import pandas as pd
 from fake_useragent import UserAgent
-import time
+from diskcache import Cache
 import random
 import re
 from datetime import datetime
 import json
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Column schema for product records built by search_products
+_SCHEMA_COLS = ['title', 'price', 'moq', 'supplier', 'link', 'image_url', 'rating', 'source']
+
+# Class-attribute needles for field dispatch (checked against lowercased class)
+_TITLE_CLASSES = ('title', 'name', 'product')
+_PRICE_CLASSES = ('price', 'cost', 'amount')
+_SUPPLIER_CLASSES = ('supplier', 'seller', 'company')
+_RATING_CLASSES = ('rating', 'star', 'review')
+_SPEC_CLASSES = ('spec', 'parameter')
+_IMG_SRC_NEEDLES = ('product', 'detail', 'gallery')
+
+# Pre-compiled patterns shared across every element/page parse
+_MOQ_RE = re.compile(r'MOQ|Min.*Order', re.I)
+# Matches "12.50" or "$12.50 - $15.00" style price strings
+_PRICE_RANGE_RE = re.compile(r'(?P<lo>\d+(?:\.\d+)?)(?:\s*-\s*\$?\s*(?P<hi>\d+(?:\.\d+)?))?')
+
+# Persistent per-URL cache for product detail pages
+_DETAILS_CACHE = Cache('.cache/product_details')
+_DETAILS_CACHE_TTL = 86400  # seconds
+
+# Fallback user agents when fake_useragent's database is unavailable
+_FALLBACK_USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+]
+
+def _iter_subtree(item: Node):
+    """Yield item's descendants in document order.
+
+    Node.traverse is not subtree-scoped - it keeps walking into the
+    item's following siblings - so walk child/next pointers manually,
+    tracking depth to stop at the item boundary (selectolax returns a
+    fresh wrapper per pointer access, so identity checks don't work).
+    """
+    node = item.child
+    depth = 0
+    while node is not None:
+        yield node
+        if node.child is not None:
+            node = node.child
+            depth += 1
+            continue
+        while depth > 0 and node.next is None:
+            node = node.parent
+            depth -= 1
+        if node.next is None:
+            return
+        node = node.next
+
+
+# CSS selectors for AliBaba's dynamic classes,
+# ordered by how likely they are to match
+_SEARCH_SELECTORS = (
+    'div[data-content*="product"]',
+    '.item-content',
+    '.product-card',
+    '.organic-list',
+    'div[component="product"]',
+)
 
 
 class AliBabaScraper:
     """Main scraper class for AliBaba products"""
     
     def __init__(self, use_proxies: bool = False):
-        self.ua = UserAgent()
-        self.session = requests.Session()
-        self.base_url = "https://www.alibaba.com"
-        self.use_proxies = use_proxies
-        self.stats = {
-            'products_scraped': 0,
-            'pages_scraped': 0,
-            'errors': 0
-        }
-        
-    def get_headers(self) -> Dict:
-        """Generate random headers for request"""
-        return {
-            'User-Agent': self.ua.random,
+        # Sample a small UA pool once - fake_useragent lookups are slow
+        try:
+            self.ua = UserAgent()
+            self._ua_pool = [self.ua.random for _ in range(32)]
+        except Exception:
+            self.ua = None
+            self._ua_pool = list(_FALLBACK_USER_AGENTS)
+        self._headers = {
+            'User-Agent': self._ua_pool[0],
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
             'Accept-Encoding': 'gzip, deflate, br',
@@ -44,82 +110,137 @@ class AliBabaScraper:
             'Sec-Fetch-Site': 'same-origin',
             'Sec-Fetch-User': '?1',
         }
+        self.session = requests.Session()
+        # Pooled connections for keep-alive across concurrent fetches,
+        # with transparent retries for transient failures
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.base_url = "https://www.alibaba.com"
+        self.use_proxies = use_proxies
+        self.stats = {
+            'products_scraped': 0,
+            'pages_scraped': 0,
+            'errors': 0
+        }
+        
+    def get_headers(self) -> Dict:
+        """Rotate the User-Agent on the shared headers dict"""
+        self._headers['User-Agent'] = random.choice(self._ua_pool)
+        return self._headers
     
-    def search_products(self, keyword: str, pages: int = 5) -> pd.DataFrame:
+    def search_products(self, keyword: str, pages: int = 5,
+                        progress_cb: Optional[Callable[[int, int], None]] = None) -> pd.DataFrame:
         """
         Search products on AliBaba
-        
+
         Args:
             keyword: Search term
             pages: Number of pages to scrape
-            
+            progress_cb: Optional callback called with (page, pages) after each page
+
         Returns:
             DataFrame with product listings
         """
+        print(f"Scraping {pages} pages for '{keyword}'...")
+        all_products = asyncio.run(self._search_async(keyword, pages, progress_cb))
+
+        # Create DataFrame against the fixed schema
+        if all_products:
+            df = pd.DataFrame.from_records(all_products, columns=_SCHEMA_COLS)
+            # Parse raw price strings into numeric bounds in one vectorized pass
+            prices = df['price'].str.extract(_PRICE_RANGE_RE)
+            df['price_min'] = pd.to_numeric(prices['lo'], errors='coerce').astype('float32')
+            df['price_max'] = pd.to_numeric(prices['hi'], errors='coerce').fillna(df['price_min']).astype('float32')
+            df = df.astype({'supplier': 'category', 'price': 'category', 'source': 'category'})
+            # A single Timestamp broadcasts; datetime64 beats per-row strftime strings
+            df['scraped_at'] = pd.Timestamp.now()
+            return df
+        else:
+            return pd.DataFrame()
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, keyword: str,
+                          page: int, sem: asyncio.Semaphore) -> bytes:
+        """Fetch one search page, bounded by the politeness semaphore"""
+        search_url = f"{self.base_url}/trade/search?SearchText={keyword}&page={page}"
+        async with sem:
+            # Same retry budget and status list as the session's HTTPAdapter,
+            # which aiohttp requests don't go through
+            for attempt in range(4):
+                # Respectful delay per concurrency slot, growing on retries
+                await asyncio.sleep(random.uniform(2, 4) + attempt * 2)
+                try:
+                    async with session.get(
+                        search_url,
+                        headers=self.get_headers(),
+                        timeout=aiohttp.ClientTimeout(total=15)
+                    ) as response:
+                        response.raise_for_status()
+                        return await response.read()
+                except aiohttp.ClientResponseError as e:
+                    if attempt == 3 or e.status not in (429, 500, 502, 503, 504):
+                        raise
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    if attempt == 3:
+                        raise
+
+    async def _search_async(self, keyword: str, pages: int,
+                            progress_cb: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """Fetch and parse all search pages with bounded concurrency"""
         all_products = []
-        
-        for page in range(1, pages + 1):
+        sem = asyncio.Semaphore(4)
+        done = 0
+
+        async def fetch_with_progress(session: aiohttp.ClientSession, page: int) -> bytes:
+            # Report each page as its fetch lands - the network phase is
+            # where the wall-clock time goes
+            nonlocal done
             try:
-                print(f"Scraping page {page}/{pages} for '{keyword}'...")
-                
-                # Construct search URL
-                search_url = f"{self.base_url}/trade/search?SearchText={keyword}&page={page}"
-                
-                # Send request
-                response = self.session.get(
-                    search_url,
-                    headers=self.get_headers(),
-                    timeout=15
-                )
-                response.raise_for_status()
-                
-                # Parse HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find product containers
-                products = self._parse_search_page(soup)
-                
+                return await self._fetch_page(session, keyword, page, sem)
+            finally:
+                done += 1
+                if progress_cb:
+                    progress_cb(done, pages)
+
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(
+                *[fetch_with_progress(session, page) for page in range(1, pages + 1)],
+                return_exceptions=True
+            )
+
+        for page, result in enumerate(results, start=1):
+            if isinstance(result, Exception):
+                print(f"Error scraping page {page}: {str(result)}")
+                self.stats['errors'] += 1
+            else:
+                tree = HTMLParser(result)
+                products = self._parse_search_page(tree)
                 if products:
                     all_products.extend(products)
                     self.stats['pages_scraped'] += 1
                     self.stats['products_scraped'] += len(products)
-                    
                     print(f"Found {len(products)} products on page {page}")
-                
-                # Respectful delay
-                time.sleep(random.uniform(2, 4))
-                
-            except Exception as e:
-                print(f"Error scraping page {page}: {str(e)}")
-                self.stats['errors'] += 1
-                continue
-        
-        # Create DataFrame
-        if all_products:
-            df = pd.DataFrame(all_products)
-            df['scraped_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            return df
-        else:
-            return pd.DataFrame()
-    
-    def _parse_search_page(self, soup: BeautifulSoup) -> List[Dict]:
+
+        return all_products
+
+    def _parse_search_page(self, tree: HTMLParser) -> List[Dict]:
         """Parse search results page"""
         products = []
-        
-        # Try different selectors for AliBaba's dynamic classes
-        selectors = [
-            'div[data-content*="product"]',
-            '.item-content',
-            '.product-card',
-            '.organic-list',
-            'div[component="product"]'
-        ]
-        
-        for selector in selectors:
-            items = soup.select(selector)
+
+        items = []
+        for selector in _SEARCH_SELECTORS:
+            items = tree.css(selector)
             if items:
                 break
-        
+
         if not items:
             return products
         
@@ -133,44 +254,51 @@ class AliBabaScraper:
         
         return products
     
-    def _extract_product_data(self, item) -> Optional[Dict]:
-        """Extract product data from HTML element"""
+    def _extract_product_data(self, item: Node) -> Optional[Dict]:
+        """Extract product data from HTML element in a single tree walk"""
         try:
-            # Extract title
-            title_elem = item.find(['h2', 'h3', 'h4'], class_=re.compile(r'title|name|product', re.I))
-            title = title_elem.get_text(strip=True) if title_elem else "No Title"
-            
-            # Extract price
-            price_elem = item.find(class_=re.compile(r'price|cost|amount', re.I))
-            price = price_elem.get_text(strip=True) if price_elem else "Price NA"
-            
-            # Extract MOQ
-            moq_elem = item.find(string=re.compile(r'MOQ|Min.*Order', re.I))
-            moq = moq_elem.strip() if moq_elem else "MOQ NA"
-            
-            # Extract supplier
-            supplier_elem = item.find(class_=re.compile(r'supplier|seller|company', re.I))
-            supplier = supplier_elem.get_text(strip=True) if supplier_elem else "Supplier NA"
-            
-            # Extract link
-            link_elem = item.find('a', href=True)
-            if link_elem:
-                link = link_elem['href']
+            title = price = moq = supplier = rating = link = img_url = None
+
+            # One pass over the subtree instead of a full selector query per field
+            for node in _iter_subtree(item):
+                if node.tag == '-text':
+                    if moq is None:
+                        text = node.text_content
+                        if text and _MOQ_RE.search(text):
+                            moq = text.strip()
+                    continue
+
+                classes = (node.attributes.get('class') or '').lower()
+
+                if title is None and node.tag in ('h2', 'h3', 'h4') and any(n in classes for n in _TITLE_CLASSES):
+                    title = node.text(strip=True)
+                if price is None and classes and any(n in classes for n in _PRICE_CLASSES):
+                    price = node.text(strip=True)
+                if supplier is None and classes and any(n in classes for n in _SUPPLIER_CLASSES):
+                    supplier = node.text(strip=True)
+                if rating is None and classes and any(n in classes for n in _RATING_CLASSES):
+                    rating = node.text(strip=True)
+                if link is None and node.tag == 'a' and node.attributes.get('href'):
+                    link = node.attributes['href']
+                if img_url is None and node.tag == 'img' and node.attributes.get('src'):
+                    img_url = node.attributes['src']
+
+            title = title if title is not None else "No Title"
+            price = price if price is not None else "Price NA"
+            moq = moq if moq is not None else "MOQ NA"
+            supplier = supplier if supplier is not None else "Supplier NA"
+            rating = rating if rating is not None else "No Rating"
+
+            if link:
                 if not link.startswith('http'):
                     link = self.base_url + link
             else:
                 link = "#"
-            
-            # Extract image
-            img_elem = item.find('img', src=True)
-            img_url = img_elem['src'] if img_elem else ""
+
+            img_url = img_url or ""
             if img_url and not img_url.startswith('http'):
                 img_url = 'https:' + img_url
-            
-            # Extract rating if available
-            rating_elem = item.find(class_=re.compile(r'rating|star|review', re.I))
-            rating = rating_elem.get_text(strip=True) if rating_elem else "No Rating"
-            
+
             return {
                 'title': title,
                 'price': price,
@@ -186,7 +314,11 @@ class AliBabaScraper:
             return None
     
     def get_product_details(self, product_url: str) -> Dict:
-        """Get detailed product information"""
+        """Get detailed product information (disk-cached per URL)"""
+        cached = _DETAILS_CACHE.get(product_url)
+        if cached is not None:
+            return cached
+
         try:
             response = self.session.get(
                 product_url,
@@ -195,25 +327,44 @@ class AliBabaScraper:
             )
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
+            tree = HTMLParser(response.content)
+
             details = {
                 'url': product_url,
-                'description': self._extract_description(soup),
-                'specifications': self._extract_specifications(soup),
-                'shipping_info': self._extract_shipping(soup),
-                'images': self._extract_images(soup),
-                'response_time': self._extract_response_time(soup),
+                'description': self._extract_description(tree),
+                'specifications': self._extract_specifications(tree),
+                'shipping_info': self._extract_shipping(tree),
+                'images': self._extract_images(tree),
+                'response_time': self._extract_response_time(tree),
                 'detail_scraped_at': datetime.now().isoformat()
             }
-            
+
+            _DETAILS_CACHE.set(product_url, details, expire=_DETAILS_CACHE_TTL)
             return details
-            
+
         except Exception as e:
             print(f"Error getting details for {product_url}: {str(e)}")
             return {}
     
-    def _extract_description(self, soup: BeautifulSoup) -> str:
+    def get_details_bulk(self, urls: List[str], max_workers: int = 16) -> Dict[str, Dict]:
+        """
+        Fetch detailed information for many products concurrently
+
+        Args:
+            urls: Product page URLs
+            max_workers: Number of parallel fetch threads
+
+        Returns:
+            Mapping of URL to details dict
+        """
+        urls = [url for url in urls if url.startswith('http')]
+        if not urls:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(executor.map(lambda url: (url, self.get_product_details(url)), urls))
+
+    def _extract_description(self, tree: HTMLParser) -> str:
         """Extract product description"""
         selectors = [
             '.product-description',
@@ -221,76 +372,75 @@ class AliBabaScraper:
             '[data-content="description"]',
             '.description-content'
         ]
-        
+
         for selector in selectors:
-            elem = soup.select_one(selector)
+            elem = tree.css_first(selector)
             if elem:
-                return elem.get_text(strip=True)[:1000]
-        
+                return elem.text(strip=True)[:1000]
+
         return "Description not available"
-    
-    def _extract_specifications(self, soup: BeautifulSoup) -> Dict:
+
+    def _extract_specifications(self, tree: HTMLParser) -> Dict:
         """Extract product specifications"""
         specs = {}
-        
+
         # Try to find specification table
-        spec_table = soup.find('table', class_=re.compile(r'spec|parameter', re.I))
-        if spec_table:
-            rows = spec_table.find_all('tr')
-            for row in rows:
-                cells = row.find_all('td')
+        for table in tree.css('table'):
+            classes = (table.attributes.get('class') or '').lower()
+            if not any(n in classes for n in _SPEC_CLASSES):
+                continue
+            for row in table.css('tr'):
+                cells = row.css('td')
                 if len(cells) >= 2:
-                    key = cells[0].get_text(strip=True)
-                    value = cells[1].get_text(strip=True)
+                    key = cells[0].text(strip=True)
+                    value = cells[1].text(strip=True)
                     specs[key] = value
-        
+            break
+
         return specs if specs else {"status": "No specifications found"}
-    
-    def _extract_shipping(self, soup: BeautifulSoup) -> str:
+
+    def _extract_shipping(self, tree: HTMLParser) -> str:
         """Extract shipping information"""
         shipping_selectors = [
             '.shipping-info',
             '.logistics-content',
             '.delivery-info'
         ]
-        
+
         for selector in shipping_selectors:
-            elem = soup.select_one(selector)
+            elem = tree.css_first(selector)
             if elem:
-                return elem.get_text(strip=True)[:500]
-        
+                return elem.text(strip=True)[:500]
+
         return "Shipping information not available"
-    
-    def _extract_images(self, soup: BeautifulSoup) -> List[str]:
+
+    def _extract_images(self, tree: HTMLParser) -> List[str]:
         """Extract product images"""
         images = []
-        img_tags = soup.find_all('img', src=re.compile(r'product|detail|gallery', re.I))
-        
-        for img in img_tags[:10]:  # Limit to 10 images
-            src = img.get('src', '')
-            if src and not src.startswith('data:'):
-                if not src.startswith('http'):
-                    src = 'https:' + src
-                images.append(src)
-        
+
+        for img in tree.css('img[src]'):
+            src = img.attributes.get('src') or ''
+            if not src or src.startswith('data:'):
+                continue
+            low = src.lower()
+            if not any(needle in low for needle in _IMG_SRC_NEEDLES):
+                continue
+            if not src.startswith('http'):
+                src = 'https:' + src
+            images.append(src)
+            if len(images) >= 10:  # Limit to 10 images
+                break
+
         return images
-    
-    def _extract_response_time(self, soup: BeautifulSoup) -> str:
+
+    def _extract_response_time(self, tree: HTMLParser) -> str:
         """Extract supplier response time"""
-        rt_selectors = [
-            'span:contains("response")',
-            'div:contains("Response Time")',
-            'li:contains("response")'
-        ]
-        
-        for selector in rt_selectors:
-            try:
-                elem = soup.select_one(selector)
-                if elem:
-                    return elem.get_text(strip=True)
-            except:
-                continue
-        
+        # CSS has no :contains(), so check each candidate's direct text
+        for node in tree.css('span, li, div'):
+            text = node.text(deep=False, strip=True)
+            if text and 'response' in text.lower():
+                return node.text(strip=True)
+
         return "Response time not specified"
     
     def save_to_file(self, df: pd.DataFrame, filename: str = None):
@@ -303,25 +453,31 @@ class AliBabaScraper:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"alibaba_products_{timestamp}"
         
-        # Save as CSV
-        csv_file = f"{filename}.csv"
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        
+        # Save as gzip-compressed CSV (text columns compress heavily)
+        csv_file = f"{filename}.csv.gz"
+        df.to_csv(csv_file, index=False, encoding='utf-8', compression='gzip')
+
+        # Save as Parquet for fast columnar re-reads
+        parquet_file = f"{filename}.parquet"
+        df.to_parquet(parquet_file, compression='zstd')
+
         # Save as Excel
         excel_file = f"{filename}.xlsx"
         df.to_excel(excel_file, index=False)
-        
+
         # Save as JSON
         json_file = f"{filename}.json"
         df.to_json(json_file, orient='records', indent=2)
-        
+
         print(f"Data saved to:")
         print(f"  - {csv_file}")
+        print(f"  - {parquet_file}")
         print(f"  - {excel_file}")
         print(f"  - {json_file}")
-        
+
         return {
             'csv': csv_file,
+            'parquet': parquet_file,
             'excel': excel_file,
             'json': json_file
         }